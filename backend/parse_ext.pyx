@@ -0,0 +1,68 @@
+# cython: language_level=3
+"""
+KMDD Compiled Event Parser
+Cython version of server.parse_input_event_from().
+
+server.py builds this on demand through pyximport and falls back to its
+pure-Python parser when Cython or a C compiler is unavailable.
+
+License: MIT
+"""
+
+# struct input_event (native layout, matches struct format 'llHHI')
+cdef struct input_event:
+    long sec
+    long usec
+    unsigned short type
+    unsigned short code
+    unsigned int value
+
+# Shared with server.py via init() so ids and names match the Python paths
+cdef object _ctr = None
+cdef object _now_str = None
+cdef tuple _key_names = ()
+cdef tuple _rel_names = ()
+cdef tuple _abs_names = ()
+cdef tuple _type_names = ()
+
+
+def init(ctr, now_str, key_names, rel_names, abs_names, type_names):
+    """Bind the server's event id counter, clock and name tables."""
+    global _ctr, _now_str, _key_names, _rel_names, _abs_names, _type_names
+    _ctr = ctr
+    _now_str = now_str
+    _key_names = tuple(key_names)
+    _rel_names = tuple(rel_names)
+    _abs_names = tuple(abs_names)
+    _type_names = tuple(type_names)
+
+
+cpdef object parse_input_event_from(const unsigned char[:] buf, Py_ssize_t offset):
+    """Parse the input_event struct at offset in buf into an event row."""
+    cdef const input_event *ev
+    cdef unsigned short ev_type, code
+    cdef unsigned int value
+
+    if offset < 0 or offset + <Py_ssize_t>sizeof(input_event) > buf.shape[0]:
+        raise ValueError('buffer too small for input_event')
+    ev = <const input_event *>&buf[offset]
+    ev_type = ev.type
+    code = ev.code
+    value = ev.value
+
+    if ev_type == 0x00:
+        return None  # Skip sync events (EV_SYN)
+
+    if ev_type == 0x01:  # EV_KEY
+        return (next(_ctr), _now_str(), 'KEY', ev_type, code, value, None,
+                _key_names[code] if code < len(_key_names) else f'KEY_{code}',
+                'repeat' if value == 2 else ('press' if value == 1 else 'release'))
+    if ev_type == 0x02:  # EV_REL
+        return (next(_ctr), _now_str(), 'REL', ev_type, code, value,
+                _rel_names[code] if code < len(_rel_names) else f'REL_{code}')
+    if ev_type == 0x03:  # EV_ABS
+        return (next(_ctr), _now_str(), 'ABS', ev_type, code, value,
+                _abs_names[code] if code < len(_abs_names) else f'ABS_{code}')
+    return (next(_ctr), _now_str(),
+            _type_names[ev_type] if ev_type < len(_type_names) else f'UNK_{ev_type}',
+            ev_type, code, value)
@@ -19,23 +19,65 @@ import sys
 import struct
 import time
 import random
+import math
 import argparse
 import glob
+import re
+import itertools
+import errno
+import functools
 import signal
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-from threading import Thread
 from pathlib import Path
 
 try:
     import websockets
+    from websockets.frames import Frame, Opcode
+    from websockets.protocol import State
 except ImportError:
     print("ERROR: 'websockets' package not found.")
     print("Install with: pip3 install websockets")
     sys.exit(1)
 
+try:
+    from aiohttp import web
+except ImportError:
+    print("ERROR: 'aiohttp' package not found.")
+    print("Install with: pip3 install aiohttp")
+    sys.exit(1)
+
+try:
+    import uvloop  # Optional: faster libuv-based event loop
+except ImportError:
+    uvloop = None
+
+try:
+    import liburing  # Optional: io_uring multishot reads for live capture
+except ImportError:
+    liburing = None
+
+try:
+    import numpy  # Optional: vectorised random draws for simulation mode
+except ImportError:
+    numpy = None
+
+try:
+    import orjson  # Optional: faster JSON encoding for broadcasts
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
+
 # ── Constants ──────────────────────────────────────────────────
-INPUT_EVENT_FORMAT = 'llHHI'  # struct input_event: time_sec, time_usec, type, code, value
-INPUT_EVENT_SIZE = struct.calcsize(INPUT_EVENT_FORMAT)
+# struct input_event: time_sec, time_usec, type, code, value
+_EVENT_STRUCT = struct.Struct('llHHI')
+_EVENT_SIZE = _EVENT_STRUCT.size
+_unpack = _EVENT_STRUCT.unpack_from
+_READ_BATCH = 32  # input_events drained per os.read()
+FLUSH_INTERVAL = 0.005  # seconds between coalesced event broadcasts
+URING_BUFFERS = 8  # provided read buffers of _READ_BATCH events each
+CLIENT_QUEUE_SIZE = 256  # outbound messages buffered per client before dropping
+DEVICE_CACHE_TTL = 1.0  # seconds to reuse the /proc/bus/input/devices scan
+SIM_BLOCK = 4096  # simulator iterations of random draws generated at once
 
 # Event types
 EV_SYN = 0x00
@@ -90,83 +132,247 @@ REL_AXIS_NAMES = {
     REL_X: "X", REL_Y: "Y", REL_WHEEL: "WHEEL", REL_HWHEEL: "HWHEEL",
 }
 
+ABS_AXIS_NAMES = {
+    0: 'ABS_X', 1: 'ABS_Y', 24: 'ABS_PRESSURE',
+    47: 'ABS_MT_SLOT', 53: 'ABS_MT_X', 54: 'ABS_MT_Y',
+    58: 'ABS_MT_PRESSURE', 57: 'ABS_MT_TRACKING_ID',
+}
+
+
+def _name_table(names, prefix):
+    """Flatten a small int-keyed name map into a tuple indexed by code."""
+    return tuple(names.get(i, f'{prefix}{i}') for i in range(max(names) + 1))
+
+
+# Tuple lookups for the hot parse path; codes past the end use the fallback
+_KEYCODE_TUPLE = _name_table(KEYCODE_NAMES, 'KEY_')
+_MAX_KC = len(_KEYCODE_TUPLE)
+_EVENT_TYPE_TUPLE = _name_table(EVENT_TYPE_NAMES, 'UNK_')
+_REL_AXIS_TUPLE = _name_table(REL_AXIS_NAMES, 'REL_')
+_ABS_AXIS_TUPLE = _name_table(ABS_AXIS_NAMES, 'ABS_')
+
+# Handlers line of each /proc/bus/input/devices block named "...Virtual..."
+_VIRTUAL_HANDLERS_RE = re.compile(
+    r'^N: Name="[^"\n]*Virtual[^\n]*\n(?:.+\n)*?H: Handlers=(.*)$', re.M)
+
+_STATUS_TEMPLATE = ('{"type":"status","devices":%s,"uptime":%d,'
+                    '"event_count":%d,"simulate":%s}')
+
+# Field names for the positional event rows sent in batch frames
+_EVENT_KEYS = ('id', 'time', 'type', 'type_id', 'code', 'value', 'axis', 'key', 'action')
+
 # ── Global State ───────────────────────────────────────────────
-connected_clients = set()
-event_counter = 0
+connected_clients = set()  # DashboardClient instances
+_ctr = itertools.count(1)  # next event id
 server_start_time = time.time()
+_pending = []  # event rows awaiting the next flush_loop() tick
+_last_id = 0  # id of the last event row flushed
+_ts_cache = [0, ""]  # [epoch second, formatted HH:MM:SS] for now_str()
+_dev_cache = (float('-inf'), [], '[]')  # (monotonic timestamp, devices, devices JSON)
+
+
+def now_str():
+    """Wall-clock time as HH:MM:SS.mmm, reformatting only once per second."""
+    t = time.time()
+    sec = int(t)
+    if sec != _ts_cache[0]:
+        _ts_cache[0] = sec
+        _ts_cache[1] = time.strftime('%H:%M:%S', time.localtime(sec))
+    return f"{_ts_cache[1]}.{int(t * 1000) % 1000:03d}"
+
+
+def events_emitted():
+    """Number of events emitted so far (ids are sequential from 1)."""
+    return _pending[-1][0] if _pending else _last_id
+
+
+def _device_cache():
+    """Return (timestamp, devices, devices_json), rescanning after the TTL."""
+    global _dev_cache
+    now = time.monotonic()
+    if now - _dev_cache[0] > DEVICE_CACHE_TTL:
+        devices = _scan_virtual_devices()
+        _dev_cache = (now, devices, json.dumps(devices))
+    return _dev_cache
 
 
 def find_virtual_devices():
-    """Find virtual input devices created by our drivers."""
+    """Find virtual input devices created by our drivers (cached briefly)."""
+    return _device_cache()[1]
+
+
+def _scan_virtual_devices():
+    """Scan /proc/bus/input/devices for our virtual input devices."""
     devices = []
     try:
         with open('/proc/bus/input/devices', 'r') as f:
             content = f.read()
-        blocks = content.split('\n\n')
-        for block in blocks:
-            if 'Virtual' in block:
-                for line in block.split('\n'):
-                    if line.startswith('H: Handlers='):
-                        handlers = line.split('=')[1]
-                        for h in handlers.split():
-                            if h.startswith('event'):
-                                devices.append(f'/dev/input/{h}')
+        for match in _VIRTUAL_HANDLERS_RE.finditer(content):
+            for h in match.group(1).split():
+                if h.startswith('event'):
+                    devices.append(f'/dev/input/{h}')
     except Exception:
         pass
     return devices
 
 
+def status_message():
+    """Serialized status message, reusing the cached device list JSON."""
+    return _STATUS_TEMPLATE % (
+        _device_cache()[2],
+        int(time.time() - server_start_time),
+        events_emitted(),
+        'true' if args.simulate else 'false',
+    )
+
+
+@functools.lru_cache(maxsize=8)
 def find_sysfs_inject_path(kind='scancode'):
-    """Find sysfs injection path for keyboard or mouse."""
+    """Find sysfs injection path for keyboard or mouse (memoized).
+
+    Kinds other than the inject shortcuts are looked up as a plain
+    driver attribute name.
+    """
     patterns = {
         'scancode': '/sys/devices/virtual/input/input*/inject_scancode',
         'packet': '/sys/devices/virtual/input/input*/inject_packet',
         'tap': '/sys/devices/virtual/input/input*/inject_tap',
     }
-    matches = glob.glob(patterns.get(kind, ''))
+    pattern = patterns.get(kind, f'/sys/devices/virtual/input/input*/{kind}')
+    matches = glob.glob(pattern)
     return matches[0] if matches else None
 
 
 def parse_input_event(data):
-    """Parse a raw Linux input_event struct into a dict."""
-    global event_counter
-    sec, usec, ev_type, code, value = struct.unpack(INPUT_EVENT_FORMAT, data)
+    """Parse a raw Linux input_event struct into an event row."""
+    return parse_input_event_from(data, 0)
+
+
+def parse_input_event_from(buf, offset):
+    """Parse the input_event struct at offset in buf into an event row.
+
+    Rows are tuples laid out as _EVENT_KEYS, truncated after the last
+    field that applies: KEY rows end with key/action, REL/ABS rows with axis.
+    """
+    sec, usec, ev_type, code, value = _unpack(buf, offset)
 
     if ev_type == EV_SYN:
         return None  # Skip sync events
 
-    event_counter += 1
-    event = {
-        'id': event_counter,
-        'time': f"{time.strftime('%H:%M:%S')}.{int(time.time() * 1000) % 1000:03d}",
-        'type': EVENT_TYPE_NAMES.get(ev_type, f'UNK_{ev_type}'),
-        'type_id': ev_type,
-        'code': code,
-        'value': value,
-    }
-
     if ev_type == EV_KEY:
-        event['key'] = KEYCODE_NAMES.get(code, f'KEY_{code}')
-        event['action'] = 'repeat' if value == 2 else ('press' if value == 1 else 'release')
-    elif ev_type == EV_REL:
-        event['axis'] = REL_AXIS_NAMES.get(code, f'REL_{code}')
-    elif ev_type == EV_ABS:
-        abs_names = {0: 'ABS_X', 1: 'ABS_Y', 24: 'ABS_PRESSURE',
-                     47: 'ABS_MT_SLOT', 53: 'ABS_MT_X', 54: 'ABS_MT_Y',
-                     58: 'ABS_MT_PRESSURE', 57: 'ABS_MT_TRACKING_ID'}
-        event['axis'] = abs_names.get(code, f'ABS_{code}')
+        return (next(_ctr), now_str(), 'KEY', ev_type, code, value, None,
+                _KEYCODE_TUPLE[code] if code < _MAX_KC else f'KEY_{code}',
+                'repeat' if value == 2 else ('press' if value == 1 else 'release'))
+    if ev_type == EV_REL:
+        return (next(_ctr), now_str(), 'REL', ev_type, code, value,
+                _REL_AXIS_TUPLE[code] if code < len(_REL_AXIS_TUPLE) else f'REL_{code}')
+    if ev_type == EV_ABS:
+        return (next(_ctr), now_str(), 'ABS', ev_type, code, value,
+                _ABS_AXIS_TUPLE[code] if code < len(_ABS_AXIS_TUPLE) else f'ABS_{code}')
+    return (next(_ctr), now_str(),
+            _EVENT_TYPE_TUPLE[ev_type] if ev_type < len(_EVENT_TYPE_TUPLE) else f'UNK_{ev_type}',
+            ev_type, code, value)
+
+
+# Prefer the Cython build of the parser (parse_ext.pyx) when it compiles
+parse_ext = None
+_parse_ext_error = None
+try:
+    import pyximport
+except ImportError:
+    pyximport = None
+if pyximport is not None:
+    # Only needed to build parse_ext; don't leave the import hook installed
+    _importers = pyximport.install(language_level=3)
+    try:
+        import parse_ext
+        parse_ext.init(_ctr, now_str, _KEYCODE_TUPLE, _REL_AXIS_TUPLE,
+                       _ABS_AXIS_TUPLE, _EVENT_TYPE_TUPLE)
+        parse_input_event_from = parse_ext.parse_input_event_from
+    except Exception as e:
+        parse_ext = None
+        _parse_ext_error = e
+    finally:
+        pyximport.uninstall(*_importers)
+
+
+class DashboardClient:
+    """A connected WebSocket client with its own outbound queue and writer task.
 
-    return event
+    Clients without negotiated extensions (e.g. permessage-deflate) are
+    "raw": broadcasts reach them as prebuilt frames written straight to
+    the transport. That needs the sans-I/O protocol, transport and drain()
+    of the asyncio implementation (websockets 14+); legacy connections
+    always go through ws.send().
+    """
+
+    __slots__ = ('ws', 'q', 'task', 'raw')
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.q = asyncio.Queue(CLIENT_QUEUE_SIZE)
+        self.task = None
+        protocol = getattr(ws, 'protocol', None)
+        self.raw = (protocol is not None and not protocol.extensions
+                    and hasattr(ws, 'transport') and hasattr(ws, 'drain'))
+
+    def enqueue(self, payload):
+        """Queue a payload without blocking, dropping the oldest if full."""
+        try:
+            self.q.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.q.get_nowait()
+            self.q.put_nowait(payload)
 
 
-async def broadcast(message):
-    """Send a message to all connected WebSocket clients."""
+async def _writer(client):
+    """Send a client's queued messages in order until it disconnects."""
+    ws = client.ws
+    try:
+        while True:
+            data = await client.q.get()
+            if not client.raw or isinstance(data, str):
+                await ws.send(data)
+                continue
+            # Prebuilt broadcast frame: bypass per-send framing
+            if ws.state is not State.OPEN:
+                return
+            ws.transport.write(data)
+            await ws.drain()
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+def broadcast(message):
+    """Queue a message for all connected WebSocket clients without awaiting.
+
+    The payload is UTF-8 JSON sent as a binary frame, serialized and framed
+    once per broadcast. A slow client only loses its own oldest messages;
+    it never stalls the others.
+    """
     if connected_clients:
-        data = json.dumps(message)
-        await asyncio.gather(
-            *[client.send(data) for client in connected_clients],
-            return_exceptions=True
-        )
+        payload = _dumps(message)
+        frame = None
+        for client in connected_clients:
+            if client.raw:
+                if frame is None:
+                    frame = Frame(Opcode.BINARY, payload).serialize(mask=False)
+                client.enqueue(frame)
+            else:
+                client.enqueue(payload)
+
+
+async def flush_loop():
+    """Periodically broadcast all pending events as a single batch frame."""
+    global _pending, _last_id
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        if not _pending:
+            continue
+        batch = _pending
+        _pending = []
+        _last_id = batch[-1][0]
+        broadcast({'type': 'batch', 'keys': _EVENT_KEYS, 'events': batch})
 
 
 # ── Device Reader ──────────────────────────────────────────────
@@ -183,29 +389,151 @@ async def read_device(device_path):
         return
 
     loop = asyncio.get_event_loop()
-    reader = asyncio.StreamReader()
-
-    while True:
+    uring = None
+    if liburing is not None:
         try:
-            data = await loop.run_in_executor(None, lambda: _read_event(fd))
-            if data:
-                event = parse_input_event(data)
-                if event:
-                    await broadcast(event)
-        except Exception:
-            await asyncio.sleep(0.01)
+            uring = UringEventReader(fd, loop)
+            print("  ⚡ Using io_uring multishot reads")
+        except Exception as e:
+            print(f"  ⚠  io_uring unavailable ({e}), falling back to add_reader")
+    if uring is None:
+        loop.add_reader(fd, _drain_events, fd, loop)
 
-
-def _read_event(fd):
-    """Blocking read of one input_event from fd."""
     try:
-        return os.read(fd, INPUT_EVENT_SIZE)
-    except BlockingIOError:
-        time.sleep(0.01)
-        return None
-    except OSError:
-        time.sleep(0.1)
-        return None
+        await asyncio.Future()  # Events are delivered by the reader callbacks
+    finally:
+        if uring is not None:
+            uring.close()
+        loop.remove_reader(fd)
+        os.close(fd)
+
+
+class UringEventReader:
+    """Read an evdev fd with one io_uring multishot read.
+
+    The kernel completes reads into a group of provided buffers without
+    further submissions and signals an eventfd watched by the event loop.
+    Consumed buffers are handed back in batches, so the ring is entered
+    only once every few wake-ups.
+    """
+
+    _READ = 1     # user_data of the multishot read
+    _PROVIDE = 2  # user_data of buffer (re)provisioning
+    _BGID = 0     # provided buffer group id
+
+    def __init__(self, fd, loop):
+        self.fd = fd
+        self.loop = loop
+        self.ring = liburing.Ring()
+        self.cqe = liburing.Cqe()
+        self.bufs = [bytearray(_EVENT_SIZE * _READ_BATCH) for _ in range(URING_BUFFERS)]
+        self.consumed = []  # buffer ids to hand back to the kernel
+        self.closed = False
+        self.efd = None
+        liburing.io_uring_queue_init(URING_BUFFERS * 2, self.ring)
+        try:
+            self.efd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+            liburing.io_uring_register_eventfd(self.ring, self.efd)
+            for bid in range(URING_BUFFERS):
+                self._provide(bid)
+            self._arm()
+            liburing.io_uring_submit(self.ring)
+            loop.add_reader(self.efd, self.reap)
+        except BaseException:
+            self.close()  # Release the ring and eventfd before falling back
+            raise
+
+    def _provide(self, bid):
+        sqe = liburing.io_uring_get_sqe(self.ring)
+        liburing.io_uring_prep_provide_buffers(sqe, self.bufs[bid], 1, self._BGID, bid)
+        liburing.io_uring_sqe_set_data64(sqe, self._PROVIDE)
+
+    def _arm(self):
+        sqe = liburing.io_uring_get_sqe(self.ring)
+        liburing.io_uring_prep_read_multishot(sqe, self.fd, self._BGID, 0, 0)
+        liburing.io_uring_sqe_set_data64(sqe, self._READ)
+
+    def reap(self):
+        """Eventfd callback: parse every completed read into _pending."""
+        try:
+            os.eventfd_read(self.efd)
+        except BlockingIOError:
+            pass
+        rearm = False
+        failed = None
+        cqe = self.cqe
+        for _ in liburing.CqeIter(self.ring, cqe):
+            entry = cqe[0]
+            try:
+                if entry.user_data != self._READ:
+                    continue
+                flags = entry.flags
+                try:
+                    res = entry.res
+                except OSError as e:  # liburing raises for negative results
+                    res = -e.errno
+                if res > 0:
+                    bid = flags >> liburing.IORING_CQE_BUFFER_SHIFT
+                    buf = self.bufs[bid]
+                    for off in range(0, res - _EVENT_SIZE + 1, _EVENT_SIZE):
+                        event = parse_input_event_from(buf, off)
+                        if event:
+                            _pending.append(event)
+                    self.consumed.append(bid)
+                if not flags & liburing.IORING_CQE_F_MORE:
+                    if res < 0 and res != -errno.ENOBUFS:
+                        failed = os.strerror(-res)
+                    elif res != 0:
+                        rearm = True  # Ran out of buffers; re-arm below
+            finally:
+                liburing.io_uring_cqe_seen(self.ring, entry)
+            if failed:
+                break
+
+        if failed:
+            self._fall_back(failed)
+            return
+        if rearm or len(self.consumed) >= URING_BUFFERS // 2:
+            for bid in self.consumed:
+                self._provide(bid)
+            self.consumed = []
+            if rearm:
+                self._arm()
+            liburing.io_uring_submit(self.ring)
+
+    def _fall_back(self, reason):
+        print(f"  ⚠  io_uring read failed ({reason}), falling back to add_reader")
+        self.close()
+        self.loop.add_reader(self.fd, _drain_events, self.fd, self.loop)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.efd is not None:
+            self.loop.remove_reader(self.efd)
+        liburing.io_uring_queue_exit(self.ring)
+        if self.efd is not None:
+            os.close(self.efd)
+
+
+def _drain_events(fd, loop):
+    """Reader callback: drain every pending input_event from fd."""
+    while True:
+        try:
+            buf = os.read(fd, _EVENT_SIZE * _READ_BATCH)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"  ⚠  Device read failed: {e}")
+            loop.remove_reader(fd)
+            return
+        for off in range(0, len(buf) - _EVENT_SIZE + 1, _EVENT_SIZE):
+            event = parse_input_event_from(buf, off)
+            if event:
+                _pending.append(event)
+        if len(buf) < _EVENT_SIZE * _READ_BATCH:
+            return
 
 
 # ── Simulation Mode ────────────────────────────────────────────
@@ -219,73 +547,67 @@ SIM_KEYS = [
 ]
 
 
+SIM_BUTTONS = [272, 273, 274]  # BTN_LEFT, BTN_RIGHT, BTN_MIDDLE
+
+
+def _sim_draws():
+    """Yield (delay, choice, key, hold, dx, dy, button) per simulator step.
+
+    Each column is drawn SIM_BLOCK values at a time, with numpy when
+    available and otherwise with random.choices() and list comprehensions
+    over random.random(), so a step costs one tuple from the block rather
+    than its own random.* calls.
+    """
+    if numpy is not None:
+        rng = numpy.random.default_rng()
+    else:
+        rand = random.random
+        deltas = range(-20, 21)
+    while True:
+        if numpy is not None:
+            cols = (rng.uniform(0.3, 1.5, SIM_BLOCK), rng.random(SIM_BLOCK),
+                    rng.choice(SIM_KEYS, SIM_BLOCK), rng.uniform(0.05, 0.15, SIM_BLOCK),
+                    rng.integers(-20, 21, SIM_BLOCK), rng.integers(-20, 21, SIM_BLOCK),
+                    rng.choice(SIM_BUTTONS, SIM_BLOCK))
+            # tolist() yields plain Python numbers, which serialize as JSON
+            yield from zip(*(col.tolist() for col in cols))
+        else:
+            yield from zip([0.3 + 1.2 * rand() for _ in range(SIM_BLOCK)],
+                           [rand() for _ in range(SIM_BLOCK)],
+                           random.choices(SIM_KEYS, k=SIM_BLOCK),
+                           [0.05 + 0.1 * rand() for _ in range(SIM_BLOCK)],
+                           random.choices(deltas, k=SIM_BLOCK),
+                           random.choices(deltas, k=SIM_BLOCK),
+                           random.choices(SIM_BUTTONS, k=SIM_BLOCK))
+
+
 async def simulate_events():
     """Generate simulated keyboard and mouse events for demo mode."""
-    global event_counter
     print("  🎮 Simulation mode active — generating fake events")
+    draws = _sim_draws()
 
     while True:
-        await asyncio.sleep(random.uniform(0.3, 1.5))
+        delay, choice, key, hold, dx, dy, btn = next(draws)
+        await asyncio.sleep(delay)
 
-        choice = random.random()
         if choice < 0.5:
             # Simulate key press + release
-            key = random.choice(SIM_KEYS)
-            event_counter += 1
-            await broadcast({
-                'id': event_counter,
-                'time': f"{time.strftime('%H:%M:%S')}.{int(time.time() * 1000) % 1000:03d}",
-                'type': 'KEY', 'type_id': EV_KEY,
-                'code': key, 'value': 1,
-                'key': KEYCODE_NAMES.get(key, f'KEY_{key}'),
-                'action': 'press',
-            })
-            await asyncio.sleep(random.uniform(0.05, 0.15))
-            event_counter += 1
-            await broadcast({
-                'id': event_counter,
-                'time': f"{time.strftime('%H:%M:%S')}.{int(time.time() * 1000) % 1000:03d}",
-                'type': 'KEY', 'type_id': EV_KEY,
-                'code': key, 'value': 0,
-                'key': KEYCODE_NAMES.get(key, f'KEY_{key}'),
-                'action': 'release',
-            })
+            name = _KEYCODE_TUPLE[key]
+            _pending.append((next(_ctr), now_str(), 'KEY', EV_KEY, key, 1, None, name, 'press'))
+            await asyncio.sleep(hold)
+            _pending.append((next(_ctr), now_str(), 'KEY', EV_KEY, key, 0, None, name, 'release'))
         elif choice < 0.8:
             # Simulate mouse movement
-            dx = random.randint(-20, 20)
-            dy = random.randint(-20, 20)
             for axis_code, axis_name, val in [(REL_X, 'X', dx), (REL_Y, 'Y', dy)]:
                 if val != 0:
-                    event_counter += 1
-                    await broadcast({
-                        'id': event_counter,
-                        'time': f"{time.strftime('%H:%M:%S')}.{int(time.time() * 1000) % 1000:03d}",
-                        'type': 'REL', 'type_id': EV_REL,
-                        'code': axis_code, 'value': val,
-                        'axis': axis_name,
-                    })
+                    _pending.append((next(_ctr), now_str(), 'REL', EV_REL,
+                                     axis_code, val, axis_name))
         else:
             # Simulate mouse button click
-            btn = random.choice([272, 273, 274])
-            event_counter += 1
-            await broadcast({
-                'id': event_counter,
-                'time': f"{time.strftime('%H:%M:%S')}.{int(time.time() * 1000) % 1000:03d}",
-                'type': 'KEY', 'type_id': EV_KEY,
-                'code': btn, 'value': 1,
-                'key': KEYCODE_NAMES.get(btn, f'BTN_{btn}'),
-                'action': 'press',
-            })
+            name = _KEYCODE_TUPLE[btn]
+            _pending.append((next(_ctr), now_str(), 'KEY', EV_KEY, btn, 1, None, name, 'press'))
             await asyncio.sleep(0.1)
-            event_counter += 1
-            await broadcast({
-                'id': event_counter,
-                'time': f"{time.strftime('%H:%M:%S')}.{int(time.time() * 1000) % 1000:03d}",
-                'type': 'KEY', 'type_id': EV_KEY,
-                'code': btn, 'value': 0,
-                'key': KEYCODE_NAMES.get(btn, f'BTN_{btn}'),
-                'action': 'release',
-            })
+            _pending.append((next(_ctr), now_str(), 'KEY', EV_KEY, btn, 0, None, name, 'release'))
 
 
 # ── Injection ──────────────────────────────────────────────────
@@ -316,18 +638,88 @@ SHIFT_CHARS = {
     '"': "'", '~': '`', '<': ',', '>': '.', '?': '/',
 }
 
+
+def _build_text_seq():
+    """Precompute the scancode lines (and their count) that type each character."""
+    table = {}
+    for ch in list(TEXT_TO_SCANCODE) + list(SHIFT_CHARS):
+        scancode = TEXT_TO_SCANCODE[SHIFT_CHARS.get(ch, ch)]
+        seq = [scancode, scancode | 0x80]  # press, release
+        if ch in SHIFT_CHARS:
+            seq = [0x2A] + seq + [0xAA]  # wrapped in L_SHIFT press/release
+        table[ch] = (b''.join(b'0x%02X\n' % sc for sc in seq), len(seq))
+    return table
+
+
+# Character -> (scancode lines, number of scancodes)
+_TEXT_SEQ = _build_text_seq()
+
+# Per-write limits of the drivers' batched sysfs inject attributes
+INJECT_MAX_SCANCODES = 64  # keyboard_driver.c INJECT_MAX_SCANCODES
+INJECT_MAX_PACKETS = 64    # mouse_driver.c INJECT_MAX_PACKETS
+
+# Open sysfs attribute fds, keyed by find_sysfs_inject_path() kind
+_inject_fds = {}
+
 # Log level state
 current_log_level = 'INFO'
 
 
+def _get_inject_fd(kind):
+    """Return a cached write fd for the sysfs attribute of kind, or None."""
+    fd = _inject_fds.get(kind)
+    if fd is None:
+        path = find_sysfs_inject_path(kind)
+        if not path:
+            find_sysfs_inject_path.cache_clear()  # Don't remember misses
+            return None
+        fd = os.open(path, os.O_WRONLY)
+        _inject_fds[kind] = fd
+    return fd
+
+
+def _drop_inject_fd(kind):
+    """Close the cached fd for kind so the next write reopens it."""
+    fd = _inject_fds.pop(kind, None)
+    if fd is not None:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+    find_sysfs_inject_path.cache_clear()
+
+
+def _write_inject(kind, data):
+    """Write data (bytes) to the sysfs attribute for kind; see _writev_inject()."""
+    return _writev_inject(kind, [data])
+
+
+def _writev_inject(kind, chunks):
+    """Write a list of byte chunks to the sysfs attribute for kind in one syscall.
+
+    Returns False if no such attribute exists. A failed write reopens the
+    attribute and is retried once, unless the driver rejected the value.
+    """
+    for retry in (False, True):
+        fd = _get_inject_fd(kind)
+        if fd is None:
+            return False
+        try:
+            os.writev(fd, chunks)
+            return True
+        except OSError as e:
+            if e.errno == errno.EINVAL:
+                raise
+            _drop_inject_fd(kind)
+            if retry:
+                raise
+
+
 def inject_scancode(scancode_hex):
     """Inject a scan code via sysfs."""
-    path = find_sysfs_inject_path('scancode')
-    if not path:
-        return {'status': 'error', 'message': 'Keyboard sysfs path not found'}
     try:
-        with open(path, 'w') as f:
-            f.write(scancode_hex)
+        if not _write_inject('scancode', scancode_hex.encode()):
+            return {'status': 'error', 'message': 'Keyboard sysfs path not found'}
         return {'status': 'ok', 'message': f'Injected {scancode_hex}'}
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
@@ -335,68 +727,97 @@ def inject_scancode(scancode_hex):
 
 def inject_mouse_packet(buttons, dx, dy):
     """Inject a mouse packet via sysfs."""
-    path = find_sysfs_inject_path('packet')
-    if not path:
-        return {'status': 'error', 'message': 'Mouse sysfs path not found'}
     try:
         packet = f"0x{buttons:02X} 0x{dx & 0xFF:02X} 0x{dy & 0xFF:02X}"
-        with open(path, 'w') as f:
-            f.write(packet)
+        if not _write_inject('packet', packet.encode()):
+            return {'status': 'error', 'message': 'Mouse sysfs path not found'}
         return {'status': 'ok', 'message': f'Injected packet: {packet}'}
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
 
 def inject_text_string(text):
-    """Convert text to scancodes and inject each character."""
+    """Convert text to scancodes and inject them in batched writes."""
     injected = 0
-    for ch in text:
-        needs_shift = ch in SHIFT_CHARS
-        base_char = SHIFT_CHARS.get(ch, ch)
-        scancode = TEXT_TO_SCANCODE.get(base_char)
-        if scancode is None:
-            continue
-        if needs_shift:
-            inject_scancode('0x2A')  # L_SHIFT press
-        inject_scancode(f'0x{scancode:02X}')  # key press
-        inject_scancode(f'0x{scancode | 0x80:02X}')  # key release
-        if needs_shift:
-            inject_scancode('0xAA')  # L_SHIFT release
-        injected += 1
+    batch = []
+    batch_size = 0
+    try:
+        for ch in text:
+            seq = _TEXT_SEQ.get(ch)
+            if seq is None:
+                continue
+            data, count = seq
+            if batch_size + count > INJECT_MAX_SCANCODES:
+                if not _writev_inject('scancode', batch):
+                    return {'status': 'error', 'message': 'Keyboard sysfs path not found'}
+                batch = []
+                batch_size = 0
+            batch.append(data)
+            batch_size += count
+            injected += 1
+        if batch and not _writev_inject('scancode', batch):
+            return {'status': 'error', 'message': 'Keyboard sysfs path not found'}
+    except OSError as e:
+        return {'status': 'error', 'message': f'Text injection failed: {e}'}
     return {'status': 'ok', 'message': f'Injected {injected} characters'}
 
 
 def inject_path_waypoints(waypoints):
     """Inject a series of mouse movement waypoints as relative packets."""
-    if not waypoints or len(waypoints) < 2:
+    if not isinstance(waypoints, list) or len(waypoints) < 2:
         return {'status': 'error', 'message': 'Need at least 2 waypoints'}
-    injected = 0
-    for i in range(1, len(waypoints)):
-        dx = waypoints[i].get('x', 0) - waypoints[i-1].get('x', 0)
-        dy = waypoints[i].get('y', 0) - waypoints[i-1].get('y', 0)
-        # Clamp to signed byte range
-        dx = max(-127, min(127, dx))
-        dy = max(-127, min(127, dy))
-        inject_mouse_packet(0, dx, dy)
-        injected += 1
-    return {'status': 'ok', 'message': f'Injected {injected} waypoint segments'}
+    packets = []
+    try:
+        for i in range(1, len(waypoints)):
+            # int() accepts any JSON number; fractional moves truncate
+            dx = int(waypoints[i].get('x', 0) - waypoints[i-1].get('x', 0))
+            dy = int(waypoints[i].get('y', 0) - waypoints[i-1].get('y', 0))
+            # Clamp to signed byte range
+            dx = max(-127, min(127, dx))
+            dy = max(-127, min(127, dy))
+            packets.append(b'0x00 0x%02X 0x%02X\n' % (dx & 0xFF, dy & 0xFF))
+    except (TypeError, ValueError, AttributeError, OverflowError) as e:
+        return {'status': 'error', 'message': f'Invalid waypoints: {e}'}
+    try:
+        for start in range(0, len(packets), INJECT_MAX_PACKETS):
+            if not _writev_inject('packet', packets[start:start + INJECT_MAX_PACKETS]):
+                return {'status': 'error', 'message': 'Mouse sysfs path not found'}
+    except OSError as e:
+        return {'status': 'error', 'message': f'Path injection failed: {e}'}
+    return {'status': 'ok', 'message': f'Injected {len(packets)} waypoint segments'}
 
 
-import math
+CIRCLE_STEPS = 36
+CIRCLE_RADIUS = 30
+
+
+def _build_circle_deltas():
+    """Precompute the relative (dx, dy) mouse moves tracing the circle preset."""
+    deltas = []
+    for i in range(1, CIRCLE_STEPS + 1):
+        prev = 2 * math.pi * (i - 1) / CIRCLE_STEPS
+        angle = 2 * math.pi * i / CIRCLE_STEPS
+        dx = int(CIRCLE_RADIUS * math.cos(angle) - CIRCLE_RADIUS * math.cos(prev))
+        dy = int(CIRCLE_RADIUS * math.sin(angle) - CIRCLE_RADIUS * math.sin(prev))
+        deltas.append((dx & 0xFF, dy & 0xFF))
+    return tuple(deltas)
+
+
+_CIRCLE_DELTAS = _build_circle_deltas()
+_CIRCLE_PACKETS = b''.join(b'0x00 0x%02X 0x%02X\n' % d for d in _CIRCLE_DELTAS)
+
 
 def inject_preset_pattern(preset_name):
     """Run a preset injection pattern."""
     if preset_name == 'hello':
         return inject_text_string('HELLO')
     elif preset_name == 'circle':
-        steps = 36
-        radius = 30
-        for i in range(steps + 1):
-            angle = 2 * math.pi * i / steps
-            dx = int(radius * math.cos(angle) - radius * math.cos(2 * math.pi * (i-1) / steps)) if i > 0 else 0
-            dy = int(radius * math.sin(angle) - radius * math.sin(2 * math.pi * (i-1) / steps)) if i > 0 else 0
-            inject_mouse_packet(0, dx & 0xFF, dy & 0xFF)
-        return {'status': 'ok', 'message': f'Injected circle pattern ({steps} steps)'}
+        try:
+            if not _write_inject('packet', _CIRCLE_PACKETS):  # one packet per line
+                return {'status': 'error', 'message': 'Mouse sysfs path not found'}
+        except OSError as e:
+            return {'status': 'error', 'message': f'Circle injection failed: {e}'}
+        return {'status': 'ok', 'message': f'Injected circle pattern ({CIRCLE_STEPS} steps)'}
     elif preset_name == 'button_barrage':
         for btn_code in [272, 273, 274] * 3:  # L, R, M x3
             scan_press = f'0x{btn_code:02X}'
@@ -408,37 +829,26 @@ def inject_preset_pattern(preset_name):
 
 def write_sysfs_attr(attr_name, value):
     """Write a value to a sysfs attribute in the keyboard/mouse driver directory."""
-    for pattern in [
-        f'/sys/devices/virtual/input/input*/{attr_name}',
-    ]:
-        matches = glob.glob(pattern)
-        if matches:
-            try:
-                with open(matches[0], 'w') as f:
-                    f.write(str(value))
-                return {'status': 'ok', 'message': f'Set {attr_name} = {value}'}
-            except Exception as e:
-                return {'status': 'error', 'message': str(e)}
-    return {'status': 'error', 'message': f'Sysfs attribute {attr_name} not found'}
+    try:
+        if not _write_inject(attr_name, str(value).encode()):
+            return {'status': 'error', 'message': f'Sysfs attribute {attr_name} not found'}
+        return {'status': 'ok', 'message': f'Set {attr_name} = {value}'}
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
 
 
 # ── WebSocket Handler ─────────────────────────────────────────
 async def ws_handler(websocket):
     """Handle a WebSocket client connection."""
     global current_log_level
-    connected_clients.add(websocket)
+    client = DashboardClient(websocket)
     client_addr = websocket.remote_address
     print(f"  🔗 Client connected: {client_addr}")
 
-    # Send initial status
-    devices = find_virtual_devices()
-    await websocket.send(json.dumps({
-        'type': 'status',
-        'devices': devices,
-        'uptime': int(time.time() - server_start_time),
-        'event_count': event_counter,
-        'simulate': args.simulate,
-    }))
+    # Queue the initial status ahead of any broadcast
+    client.enqueue(status_message())
+    client.task = asyncio.create_task(_writer(client))
+    connected_clients.add(client)
 
     try:
         async for message in websocket:
@@ -528,14 +938,7 @@ async def ws_handler(websocket):
                     }))
 
                 elif action == 'get_status':
-                    devices = find_virtual_devices()
-                    await websocket.send(json.dumps({
-                        'type': 'status',
-                        'devices': devices,
-                        'uptime': int(time.time() - server_start_time),
-                        'event_count': event_counter,
-                        'simulate': args.simulate,
-                    }))
+                    await websocket.send(status_message())
 
             except json.JSONDecodeError:
                 await websocket.send(json.dumps({
@@ -545,33 +948,38 @@ async def ws_handler(websocket):
     except websockets.exceptions.ConnectionClosed:
         pass
     finally:
-        connected_clients.discard(websocket)
+        connected_clients.discard(client)
+        client.task.cancel()
         print(f"  ❌ Client disconnected: {client_addr}")
 
 
 # ── HTTP Server ────────────────────────────────────────────────
-class DashboardHTTPHandler(SimpleHTTPRequestHandler):
-    """Serve the UI files from the ui/ directory."""
+UI_DIR = Path(__file__).parent.parent / 'ui'
 
-    def __init__(self, *a, **kw):
-        ui_dir = str(Path(__file__).parent.parent / 'ui')
-        super().__init__(*a, directory=ui_dir, **kw)
 
-    def log_message(self, format, *a):
-        # Suppress default logging noise
-        pass
+@web.middleware
+async def dashboard_headers(request, handler):
+    """Add CORS and no-cache headers for development."""
+    response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 
-    def end_headers(self):
-        # Add CORS headers for development
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Cache-Control', 'no-cache')
-        super().end_headers()
+async def serve_index(request):
+    """Serve the dashboard page at the site root."""
+    return web.FileResponse(UI_DIR / 'index.html')
 
 
-def run_http_server(port):
-    """Run the HTTP server in a background thread."""
-    server = HTTPServer(('0.0.0.0', port), DashboardHTTPHandler)
-    server.serve_forever()
+async def start_http_server(port):
+    """Serve the UI files from the ui/ directory on the running event loop."""
+    app = web.Application(middlewares=[dashboard_headers])
+    app.router.add_get('/', serve_index)
+    app.router.add_static('/', UI_DIR)
+    runner = web.AppRunner(app, access_log=None)  # Suppress request logging noise
+    await runner.setup()
+    await web.TCPSite(runner, '0.0.0.0', port).start()
+    return runner
 
 
 # ── Main ───────────────────────────────────────────────────────
@@ -613,15 +1021,24 @@ async def main():
     print("╚═══════════════════════════════════════════════╝")
     print()
 
-    # Start HTTP server in background thread
-    http_thread = Thread(target=run_http_server, args=(args.port,), daemon=True)
-    http_thread.start()
+    if parse_ext is not None:
+        print("  ⚡ Using compiled event parser")
+    elif _parse_ext_error is not None:
+        print(f"  ⚠  Compiled event parser unavailable ({_parse_ext_error}), using Python parser")
+
+    # Start HTTP server on the same event loop
+    http_runner = await start_http_server(args.port)
     print(f"  🌐 HTTP server running on port {args.port}")
 
     # Start WebSocket server
-    ws_server = await websockets.serve(ws_handler, '0.0.0.0', args.ws_port)
+    # Batches are small and mostly unique: compressing them per client costs
+    # more than it saves, and it would rule out prebuilt broadcast frames.
+    ws_server = await websockets.serve(ws_handler, '0.0.0.0', args.ws_port,
+                                       compression=None)
     print(f"  🔌 WebSocket server running on port {args.ws_port}")
 
+    flush_task = asyncio.create_task(flush_loop())
+
     if args.simulate:
         # Simulation mode
         await simulate_events()
@@ -644,6 +1061,12 @@ async def main():
 
 if __name__ == '__main__':
     try:
-        asyncio.run(main())
+        if uvloop is None:
+            asyncio.run(main())
+        elif sys.version_info >= (3, 12):
+            asyncio.run(main(), loop_factory=uvloop.new_event_loop)
+        else:
+            uvloop.install()
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("\n  👋 Server stopped.")
@@ -26,9 +26,12 @@
 #include <linux/proc_fs.h>
 #include <linux/seq_file.h>
 #include <linux/jiffies.h>
+#include <linux/mutex.h>
+#include <linux/delay.h>
 
 #define DRIVER_NAME "virtual_keyboard"
 #define BUFFER_SIZE 256
+#define INJECT_MAX_SCANCODES 64  /* per sysfs write, well below BUFFER_SIZE */
 
 /* Module parameters for key repeat configuration */
 static int repeat_delay = 250;   /* ms before repeat starts */
@@ -66,6 +69,7 @@ struct vkbd_device {
 
 static struct vkbd_device *vkbd_dev;
 static struct proc_dir_entry *vkbd_proc_entry;
+static DEFINE_MUTEX(vkbd_inject_lock);  /* serialises sysfs injection batches */
 
 /*
  * Extended Scan Code to Linux Keycode Translation Table
@@ -217,6 +221,18 @@ static bool buffer_full(struct vkbd_device *dev)
     return ((dev->head + 1) % BUFFER_SIZE) == dev->tail;
 }
 
+static int buffer_space(struct vkbd_device *dev)
+{
+    unsigned long flags;
+    int space;
+    
+    spin_lock_irqsave(&dev->buffer_lock, flags);
+    space = (dev->tail + BUFFER_SIZE - dev->head - 1) % BUFFER_SIZE;
+    spin_unlock_irqrestore(&dev->buffer_lock, flags);
+    
+    return space;
+}
+
 static void buffer_push(struct vkbd_device *dev, unsigned char scancode)
 {
     unsigned long flags;
@@ -382,26 +398,70 @@ static void vkbd_simulate_irq(unsigned char scancode)
  * Sysfs Interfaces
  */
 
-/* Inject scan code */
+/* Inject one or more whitespace-separated scan codes */
 static ssize_t inject_scancode_store(struct device *dev,
                                       struct device_attribute *attr,
                                       const char *buf, size_t count)
 {
+    unsigned char scancodes[INJECT_MAX_SCANCODES];
     unsigned long scancode;
-    int ret;
+    const char *p = buf;
+    char *endp;
+    int i, n = 0;
     
-    ret = kstrtoul(buf, 0, &scancode);
-    if (ret)
-        return ret;
+    /* Validate the whole write first so a bad one injects nothing */
+    for (;;) {
+        while (*p == ' ' || *p == '\t' || *p == '\n')
+            p++;
+        
+        if (!*p)
+            break;
+        
+        if (n == INJECT_MAX_SCANCODES) {
+            pr_warn("%s: Too many scan codes in one write (max %d)\n",
+                    DRIVER_NAME, INJECT_MAX_SCANCODES);
+            return -EINVAL;
+        }
+        
+        scancode = simple_strtoul(p, &endp, 0);
+        if (endp == p) {
+            pr_warn("%s: Invalid scan code format\n", DRIVER_NAME);
+            return -EINVAL;
+        }
+        
+        if (scancode > 0xFF) {
+            pr_warn("%s: Invalid scan code 0x%lx (must be 0-255)\n",
+                    DRIVER_NAME, scancode);
+            return -EINVAL;
+        }
+        
+        scancodes[n++] = (unsigned char)scancode;
+        p = endp;
+    }
     
-    if (scancode > 0xFF) {
-        pr_warn("%s: Invalid scan code 0x%lx (must be 0-255)\n",
-                DRIVER_NAME, scancode);
+    if (n == 0)
         return -EINVAL;
+    
+    /*
+     * Wait for the tasklet to make room for the whole batch, so writes
+     * issued back to back never overflow the ring and drop scan codes
+     * (e.g. an L_SHIFT release, leaving Shift stuck).
+     */
+    if (mutex_lock_interruptible(&vkbd_inject_lock))
+        return -EINTR;
+    while (buffer_space(vkbd_dev) < n) {
+        tasklet_schedule(&vkbd_dev->tasklet);
+        if (msleep_interruptible(1)) {
+            mutex_unlock(&vkbd_inject_lock);
+            return -EINTR;
+        }
     }
     
-    pr_info("%s: Injecting scan code 0x%02lx\n", DRIVER_NAME, scancode);
-    vkbd_simulate_irq((unsigned char)scancode);
+    for (i = 0; i < n; i++) {
+        pr_info("%s: Injecting scan code 0x%02x\n", DRIVER_NAME, scancodes[i]);
+        vkbd_simulate_irq(scancodes[i]);
+    }
+    mutex_unlock(&vkbd_inject_lock);
     
     return count;
 }
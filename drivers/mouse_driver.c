@@ -34,11 +34,14 @@
 #include <linux/proc_fs.h>
 #include <linux/seq_file.h>
 #include <linux/jiffies.h>
+#include <linux/mutex.h>
+#include <linux/delay.h>
 
 #define DRIVER_NAME "virtual_mouse"
 #define BUFFER_SIZE 512
 #define PACKET_SIZE_STANDARD 3
 #define PACKET_SIZE_INTELLIMOUSE 4
+#define INJECT_MAX_PACKETS 64  /* per sysfs write, well below BUFFER_SIZE */
 
 /* Module parameters */
 static int dpi_multiplier = 100;  /* percentage, 100 = 1:1 */
@@ -80,6 +83,7 @@ struct vmouse_device {
 
 static struct vmouse_device *vmouse_dev;
 static struct proc_dir_entry *vmouse_proc_entry;
+static DEFINE_MUTEX(vmouse_inject_lock);  /* serialises sysfs injection batches */
 
 /*
  * PS/2 Packet Bit Definitions
@@ -111,6 +115,18 @@ static bool buffer_full(struct vmouse_device *dev)
     return ((dev->head + 1) % BUFFER_SIZE) == dev->tail;
 }
 
+static int buffer_space(struct vmouse_device *dev)
+{
+    unsigned long flags;
+    int space;
+    
+    spin_lock_irqsave(&dev->buffer_lock, flags);
+    space = (dev->tail + BUFFER_SIZE - dev->head - 1) % BUFFER_SIZE;
+    spin_unlock_irqrestore(&dev->buffer_lock, flags);
+    
+    return space;
+}
+
 static void buffer_push(struct vmouse_device *dev, unsigned char byte)
 {
     unsigned long flags;
@@ -274,22 +290,18 @@ static void vmouse_simulate_irq(unsigned char byte)
  * Sysfs Interfaces
  */
 
-/* Inject packet (3 or 4 bytes) */
-static ssize_t inject_packet_store(struct device *dev,
-                                     struct device_attribute *attr,
-                                     const char *buf, size_t count)
+/* Parse one packet line; returns the number of bytes read or -EINVAL */
+static int vmouse_parse_packet(const char **pp, unsigned long *bytes, int expected)
 {
-    unsigned long bytes[4];
-    int i, n;
-    const char *p = buf;
+    const char *p = *pp;
     char *endp;
-    int expected = vmouse_dev->current_packet_size;
+    int i;
     
     for (i = 0; i < expected; i++) {
-        while (*p && (*p == ' ' || *p == '\t' || *p == '\n'))
+        while (*p == ' ' || *p == '\t')
             p++;
         
-        if (!*p)
+        if (!*p || *p == '\n')
             break;
         
         bytes[i] = simple_strtoul(p, &endp, 0);
@@ -306,28 +318,93 @@ static ssize_t inject_packet_store(struct device *dev,
         p = endp;
     }
     
-    n = i;
+    /* Skip the rest of the line */
+    while (*p && *p != '\n')
+        p++;
+    if (*p == '\n')
+        p++;
     
-    /* Accept both 3-byte and 4-byte packets */
-    if (n != 3 && n != 4) {
-        pr_warn("%s: Expected 3 or 4 bytes, got %d\n", DRIVER_NAME, n);
-        return -EINVAL;
-    }
+    *pp = p;
+    return i;
+}
 
-    /* Temporarily adjust packet size if 3-byte packet in intellimouse mode */
-    if (n == 3 && vmouse_dev->current_packet_size == PACKET_SIZE_INTELLIMOUSE) {
-        unsigned int saved = vmouse_dev->current_packet_size;
-        vmouse_dev->current_packet_size = PACKET_SIZE_STANDARD;
-        for (i = 0; i < n; i++)
-            vmouse_simulate_irq((unsigned char)bytes[i]);
-        /* Wait for tasklet to process then restore */
-        tasklet_disable(&vmouse_dev->tasklet);
-        tasklet_enable(&vmouse_dev->tasklet);
-        vmouse_dev->current_packet_size = saved;
-    } else {
+/* Inject packets (3 or 4 bytes each, one packet per line) */
+static ssize_t inject_packet_store(struct device *dev,
+                                     struct device_attribute *attr,
+                                     const char *buf, size_t count)
+{
+    unsigned char packets[INJECT_MAX_PACKETS][4];
+    unsigned char sizes[INJECT_MAX_PACKETS];
+    unsigned long bytes[4];
+    int i, k, n, npackets = 0, total = 0;
+    const char *p = buf;
+    int expected = vmouse_dev->current_packet_size;
+    
+    /* Validate the whole write first so a bad one injects nothing */
+    while (*p) {
+        n = vmouse_parse_packet(&p, bytes, expected);
+        if (n < 0)
+            return n;
+        
+        if (n == 0)
+            continue;  /* Blank line, e.g. a trailing newline */
+        
+        /* Accept both 3-byte and 4-byte packets */
+        if (n != 3 && n != 4) {
+            pr_warn("%s: Expected 3 or 4 bytes, got %d\n", DRIVER_NAME, n);
+            return -EINVAL;
+        }
+        
+        if (npackets == INJECT_MAX_PACKETS) {
+            pr_warn("%s: Too many packets in one write (max %d)\n",
+                    DRIVER_NAME, INJECT_MAX_PACKETS);
+            return -EINVAL;
+        }
+        
         for (i = 0; i < n; i++)
-            vmouse_simulate_irq((unsigned char)bytes[i]);
+            packets[npackets][i] = (unsigned char)bytes[i];
+        sizes[npackets++] = n;
+        total += n;
+    }
+    
+    if (npackets == 0) {
+        pr_warn("%s: Expected 3 or 4 bytes, got 0\n", DRIVER_NAME);
+        return -EINVAL;
+    }
+    
+    /*
+     * Wait for the tasklet to make room for the whole batch, so writes
+     * issued back to back never overflow the ring and desync packets.
+     */
+    if (mutex_lock_interruptible(&vmouse_inject_lock))
+        return -EINTR;
+    while (buffer_space(vmouse_dev) < total) {
+        tasklet_schedule(&vmouse_dev->tasklet);
+        if (msleep_interruptible(1)) {
+            mutex_unlock(&vmouse_inject_lock);
+            return -EINTR;
+        }
+    }
+    
+    for (k = 0; k < npackets; k++) {
+        n = sizes[k];
+        
+        /* Temporarily adjust packet size if 3-byte packet in intellimouse mode */
+        if (n == 3 && vmouse_dev->current_packet_size == PACKET_SIZE_INTELLIMOUSE) {
+            unsigned int saved = vmouse_dev->current_packet_size;
+            vmouse_dev->current_packet_size = PACKET_SIZE_STANDARD;
+            for (i = 0; i < n; i++)
+                vmouse_simulate_irq(packets[k][i]);
+            /* Wait for tasklet to process then restore */
+            tasklet_disable(&vmouse_dev->tasklet);
+            tasklet_enable(&vmouse_dev->tasklet);
+            vmouse_dev->current_packet_size = saved;
+        } else {
+            for (i = 0; i < n; i++)
+                vmouse_simulate_irq(packets[k][i]);
+        }
     }
+    mutex_unlock(&vmouse_inject_lock);
     
     return count;
 }
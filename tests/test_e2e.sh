@@ -154,8 +154,10 @@ async def test():
             try:
                 msg = await asyncio.wait_for(ws.recv(), timeout=3)
                 data = json.loads(msg)
-                if data.get('type') in ['KEY', 'REL', 'ABS']:
-                    count += 1
+                if data.get('type') == 'batch':
+                    events = [dict(zip(data['keys'], row)) for row in data['events']]
+                    count += sum(1 for ev in events
+                                 if ev.get('type') in ['KEY', 'REL', 'ABS'])
             except asyncio.TimeoutError:
                 break
         print(f'EVENTS:{count}')
@@ -229,6 +231,49 @@ else
     fail "preset 'hello' failed: $PRESET_RESULT"
 fi
 
+# ─── Path Injection Input Validation ─────────────────────
+log_test "Injection command: inject_path with float and invalid waypoints"
+
+PATH_RESULT=$(python3 -c "
+import asyncio, json, websockets
+
+CASES = [
+    [{'x': 0.5, 'y': 0}, {'x': 10, 'y': 3}],  # floats are valid JSON numbers
+    [{'x': 'a', 'y': 0}, {'x': 10, 'y': 3}],  # non-numeric coordinate
+]
+
+async def test():
+    async with websockets.connect('ws://localhost:8765') as ws:
+        await asyncio.wait_for(ws.recv(), timeout=5)
+        for waypoints in CASES:
+            cmd = json.dumps({'action': 'inject_path', 'waypoints': waypoints})
+            await ws.send(cmd)
+            for _ in range(10):
+                msg = await asyncio.wait_for(ws.recv(), timeout=3)
+                data = json.loads(msg)
+                if data.get('type') == 'inject_result':
+                    break
+            else:
+                print('FAIL:no_result')
+                return
+        # The connection must still serve commands afterwards
+        await ws.send(json.dumps({'action': 'get_status'}))
+        for _ in range(10):
+            msg = await asyncio.wait_for(ws.recv(), timeout=3)
+            if json.loads(msg).get('type') == 'status':
+                print(f'OK:{len(CASES)} waypoint sets answered, connection still open')
+                return
+        print('FAIL:no_status')
+
+asyncio.run(test())
+" 2>/dev/null || echo "FAIL:error")
+
+if echo "$PATH_RESULT" | grep -q "OK:"; then
+    pass "inject_path handled: ${PATH_RESULT#OK:}"
+else
+    fail "inject_path failed: $PATH_RESULT"
+fi
+
 # ─── Settings Command Test ─────────────────────────────────
 log_test "Settings command: set_log_level"
 
@@ -257,6 +302,53 @@ else
     fail "set_log_level failed: $SETTINGS_RESULT"
 fi
 
+# ─── io_uring Device Reader ───────────────────────────────
+log_test "io_uring reader: buffer exhaustion and add_reader fallback"
+
+URING_RESULT=$(python3 -c "
+import asyncio, os, struct, sys
+sys.path.insert(0, '${PROJECT_DIR}/backend')
+import server
+
+EV = struct.pack('llHHI', 0, 0, 1, 30, 1)
+
+async def test():
+    if server.liburing is None:
+        print('SKIP:liburing not installed')
+        return
+    loop = asyncio.get_running_loop()
+    r, w = os.pipe()
+    task = asyncio.create_task(server.read_device(f'/proc/self/fd/{r}'))
+    await asyncio.sleep(0.1)
+    for burst in range(2):
+        for _ in range(30):
+            os.write(w, EV)  # one completion (and one buffer) per write
+        await asyncio.sleep(0.2)
+    got = len(server._pending)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    if got != 60:
+        print(f'FAIL:rearm delivered {got}/60 events')
+        return
+    # Reading the write end of a pipe fails; the reader must fall back
+    reader = server.UringEventReader(w, loop)
+    await asyncio.sleep(0.1)
+    if not reader.closed or not loop.remove_reader(w):
+        print('FAIL:no add_reader fallback')
+        return
+    print('OK:60 events across buffer exhaustion, fallback on read error')
+
+asyncio.run(test())
+" 2>/dev/null | tail -1 || echo "FAIL:error")
+
+if echo "$URING_RESULT" | grep -q "OK:"; then
+    pass "${URING_RESULT#OK:}"
+elif echo "$URING_RESULT" | grep -q "SKIP:"; then
+    pass "io_uring reader skipped (${URING_RESULT#SKIP:})"
+else
+    fail "io_uring reader failed: $URING_RESULT"
+fi
+
 # ─── UI File Integrity ────────────────────────────────────
 log_test "UI file integrity checks"
 
@@ -107,11 +107,14 @@
     dom.counterValue = dom.eventCounter.querySelector('.counter-value');
 
     // ── WebSocket Manager ─────────────────────────────────────
+    const utf8Decoder = new TextDecoder();
+
     function connect() {
         const url = dom.wsUrlInput ? dom.wsUrlInput.value : CONFIG.wsUrl;
 
         try {
             state.ws = new WebSocket(url);
+            state.ws.binaryType = 'arraybuffer';
         } catch (e) {
             setConnectionStatus('disconnected', 'Error');
             return;
@@ -126,7 +129,10 @@
 
         state.ws.onmessage = (evt) => {
             try {
-                const data = JSON.parse(evt.data);
+                // Broadcasts arrive as binary UTF-8 JSON, replies as text
+                const text = typeof evt.data === 'string'
+                    ? evt.data : utf8Decoder.decode(evt.data);
+                const data = JSON.parse(text);
                 handleMessage(data);
             } catch (e) {
                 console.warn('[KMDD] Bad message:', evt.data);
@@ -187,6 +193,19 @@
             return;
         }
 
+        if (data.type === 'batch') {
+            // Events arrive as positional rows named by data.keys
+            const keys = data.keys;
+            for (const row of data.events) {
+                const ev = {};
+                for (let i = 0; i < row.length; i++) {
+                    if (row[i] !== null) ev[keys[i]] = row[i];
+                }
+                handleEvent(ev);
+            }
+            return;
+        }
+
         // Input event
         handleEvent(data);
     }